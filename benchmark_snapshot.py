@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark for columnar corpus snapshots.
+
+Builds a synthetic corpus, writes it in each available layout, and times
+loading plus the aggregate queries used for corpus analysis.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent))
+
+from src.models import Exercise, Solution, SolutionStatus, CorpusSnapshot, write_snapshot
+from src.models import snapshot
+
+
+MODELS = [
+    "meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo",
+    "Qwen/Qwen2.5-7B-Instruct-Turbo",
+    "deepseek-ai/DeepSeek-R1",
+]
+METHODS = ["deterministic_subsubsection_exercise", "deterministic_environment_exercise", "agent_based"]
+
+
+def build_corpus(num_exercises: int, solutions_per_exercise: int):
+    """Synthetic exercises with a fixed seed so runs are comparable."""
+    rng = random.Random(0)
+    exercises = []
+    for i in range(num_exercises):
+        exercise = Exercise(
+            id=f"{i // 676 + 1}.{i // 26 % 26 + 1}.{chr(65 + i % 26)}",
+            title="Exercise",
+            content=f"Show that $\\mathcal{{C}}_{{{i}}}$ is a groupoid.",
+            extraction_method=rng.choice(METHODS),
+            extraction_confidence=rng.random()
+        )
+        for _ in range(solutions_per_exercise):
+            exercise.add_solution(Solution(
+                content="Proof. Every morphism has an inverse.",
+                status=rng.choice(list(SolutionStatus)),
+                model_name=rng.choice(MODELS)
+            ))
+        exercises.append(exercise)
+    return exercises
+
+
+def timed(label: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"  {label}: {(time.perf_counter() - started) * 1000:.2f} ms")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark columnar corpus snapshots.")
+    parser.add_argument('--exercises', type=int, default=10000)
+    parser.add_argument('--solutions-per-exercise', type=int, default=10)
+    args = parser.parse_args()
+
+    exercises = build_corpus(args.exercises, args.solutions_per_exercise)
+    layouts = ["numpy"] + (["arrow"] if snapshot.pa is not None else [])
+
+    for layout in layouts:
+        print(f"=== {layout} layout: {args.exercises} exercises, "
+              f"{args.exercises * args.solutions_per_exercise} solutions ===")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "snapshot"
+            timed("write", lambda: write_snapshot(exercises, path, layout=layout))
+            snap = timed("load", lambda: CorpusSnapshot.load(path))
+            timed("solutions by model", snap.solution_counts_by_model)
+            timed("approved solutions by model", lambda: snap.solution_counts_by_model(SolutionStatus.APPROVED))
+            timed("solutions by status", lambda: snap.count_by('solutions', 'status'))
+            timed("exercises by extraction method", lambda: snap.count_by('exercises', 'extraction_method'))
+            timed("confidence histogram", snap.confidence_histogram)
+            timed("mean confidence by method", snap.mean_confidence_by_method)
+            print(f"  {snap.solution_counts_by_model()}")
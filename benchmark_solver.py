@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the multi-model solver against stub backends.
+
+Compares trying the backends one after another with racing them
+concurrently, and reports how many in-flight attempts were cancelled.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent))
+
+from src.models import Exercise
+from src.solving import MultiModelSolver, StubBackend
+
+
+def review(exercise, content):
+    """Stub reviewer: approve attempts the stub marked as correct."""
+    approved = content.endswith("Q.E.D.")
+    return approved, [] if approved else ["Proof is incomplete"]
+
+
+def make_backends(cap: int):
+    return [
+        StubBackend("fast-wrong", latency=0.05, jitter=0.05, correct=False, max_concurrency=cap),
+        StubBackend("medium", latency=0.10, jitter=0.10, max_concurrency=cap),
+        StubBackend("slow", latency=0.30, jitter=0.20, max_concurrency=cap),
+        StubBackend("flaky", latency=0.08, fail=True, max_concurrency=cap),
+    ]
+
+
+def make_exercises(count: int):
+    return [Exercise(id=f"1.{i // 26 + 1}.{chr(65 + i % 26)}", title="Exercise", content="...")
+            for i in range(count)]
+
+
+async def solve_sequentially(backends, exercises):
+    """Baseline: try each backend in turn until one is approved."""
+    for exercise in exercises:
+        for backend in backends:
+            try:
+                content = await backend.solve(exercise)
+            except Exception:
+                continue
+            if review(exercise, content)[0]:
+                break
+
+
+async def main(num_exercises: int, cap: int):
+    exercises = make_exercises(num_exercises)
+
+    backends = make_backends(cap)
+    started = time.perf_counter()
+    await solve_sequentially(backends, exercises)
+    sequential = time.perf_counter() - started
+
+    backends = make_backends(cap)
+    solver = MultiModelSolver(backends, reviewer=review)
+    exercises = make_exercises(num_exercises)
+    started = time.perf_counter()
+    winners = await solver.solve_all(exercises)
+    raced = time.perf_counter() - started
+
+    attempts = sum(len(ex.solutions) for ex in exercises)
+    approved = sum(1 for w in winners if w is not None)
+
+    print("=== Multi-Model Solver Benchmark ===")
+    print(f"Exercises: {num_exercises}, backends: {len(backends)}, per-backend cap: {cap}")
+    print(f"Sequential fallback: {sequential:.2f} s")
+    print(f"Concurrent racing:   {raced:.2f} s")
+    print(f"Approved: {approved}/{num_exercises}, attempts recorded: {attempts}")
+    for backend in backends:
+        print(f"  {backend.name}: {backend.calls} calls, {backend.completed} completed, "
+              f"{backend.cancelled} cancelled")
+
+    winner_models = {}
+    for exercise in exercises:
+        solution = exercise.get_approved_solution()
+        if solution is not None:
+            winner_models[solution.model_name] = winner_models.get(solution.model_name, 0) + 1
+    print(f"Winning models: {winner_models}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the multi-model solver with stub backends.")
+    parser.add_argument('--exercises', type=int, default=20)
+    parser.add_argument('--cap', type=int, default=4, help="Per-backend concurrency cap")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.exercises, args.cap))
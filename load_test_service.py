@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Load test for the local extraction service against a stubbed model backend.
+
+Starts the service in-process with a stub Together client that sleeps for a
+fixed latency, fires concurrent requests drawn from a small set of documents,
+and reports throughput, latency percentiles and how many model calls were made.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent))
+
+from src.parsing.parsing_exercises import HybridExerciseExtractor
+from src.parsing.service import ExtractionService, ExtractionServiceClient, create_server
+
+
+class StubTogether:
+    """Stands in for the Together client: fixed latency, canned JSON answer."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+        content = json.dumps({"exercises": [{
+            "id": "1.1.A",
+            "title": "Unimportant Exercise",
+            "content": "A category in which each morphism is an isomorphism is called a groupoid.",
+            "confidence": 0.95
+        }]})
+        text = f"```json\n{content}\n```"
+        if kwargs.get('stream'):
+            # Deliver the answer in small pieces, like the streaming API
+            return iter([
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + 16]))])
+                for i in range(0, len(text), 16)
+            ])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def run_load_test(requests: int, concurrency: int, documents: int, latency: float,
+                  use_socket: bool) -> None:
+    """Run the load test and print a summary."""
+    latex_file = Path(__file__).parent / "data" / "latex" / "FOAG_1_1.tex"
+    with open(latex_file, 'r', encoding='utf-8') as f:
+        base_content = f.read()
+    # Distinct documents, so some requests miss the cache
+    docs = [f"{base_content}\n% revision {i}\n" for i in range(documents)]
+
+    stub = StubTogether(latency)
+    service = ExtractionService(
+        extractor_factory=lambda: HybridExerciseExtractor(client=stub),
+        pool_size=concurrency
+    )
+
+    socket_path = str(Path(tempfile.mkdtemp()) / "extract.sock") if use_socket else None
+    server = create_server(service, port=0, socket_path=socket_path, quiet=True)
+    server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+    server_thread.start()
+
+    if socket_path:
+        client = ExtractionServiceClient(socket_path=socket_path)
+    else:
+        client = ExtractionServiceClient(port=server.server_address[1])
+
+    def one_request(i: int) -> float:
+        started = time.perf_counter()
+        client.extract(docs[i % documents])
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(one_request, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    server.shutdown()
+    server.server_close()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+    stats = service.get_stats()
+    print("=== Extraction Service Load Test ===")
+    print(f"Transport: {'unix socket' if socket_path else 'tcp'}")
+    print(f"Requests: {requests}, concurrency: {concurrency}, documents: {documents}, "
+          f"stub latency: {latency * 1000:.0f} ms")
+    print(f"Throughput: {requests / elapsed:.1f} req/s")
+    print(f"Latency p50: {percentile(0.50):.1f} ms, p99: {percentile(0.99):.1f} ms, "
+          f"mean: {statistics.mean(latencies) * 1000:.1f} ms")
+    print(f"Model calls: {stub.calls} (computed {stats['computed']}, coalesced {stats['coalesced']}, "
+          f"cache hits {stats['cache_hits']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the extraction service.")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--documents', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.5, help="Stub model latency in seconds")
+    parser.add_argument('--unix-socket', action='store_true')
+    args = parser.parse_args()
+
+    run_load_test(args.requests, args.concurrency, args.documents, args.latency, args.unix_socket)
@@ -8,10 +8,16 @@ from .exercise import (
     ExerciseStatus,
     SolutionStatus
 )
+from .snapshot import (
+    CorpusSnapshot,
+    write_snapshot
+)
 
 __all__ = [
     'Exercise',
     'Solution', 
     'ExerciseStatus',
-    'SolutionStatus'
+    'SolutionStatus',
+    'CorpusSnapshot',
+    'write_snapshot'
 ]
\ No newline at end of file
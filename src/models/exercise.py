@@ -105,6 +105,7 @@ class Exercise:
             'chapter': self.chapter,
             'section': self.section,
             'extraction_method': self.extraction_method,
+            'extraction_confidence': self.extraction_confidence,
             'extraction_timestamp': self.extraction_timestamp.isoformat()}
     
     def to_json(self, file_path: Optional[Path] = None) -> str:
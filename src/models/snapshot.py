@@ -0,0 +1,428 @@
+"""
+Columnar snapshots of exercise corpora.
+
+A snapshot stores exercises and their solutions as two column tables, so
+whole-corpus questions (confidence distributions, extraction methods,
+solution counts by model) are answered with vectorized array operations
+instead of loading one JSON file and one Exercise per row.
+
+Two on-disk layouts are supported:
+
+- "arrow": Arrow IPC files, written when pyarrow is installed
+- "numpy": one .npy file per column plus raw UTF-8 buffers for text
+
+Both use dictionary-encoded extraction_method, status and model_name
+columns and are memory-mapped on load. Rows are sorted by exercise ID and
+dictionaries are sorted, so the same corpus always produces the same files.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .exercise import Exercise, ExerciseStatus, SolutionStatus
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+
+SNAPSHOT_VERSION = 1
+META_FILE = "meta.json"
+
+# Column layout per table: name -> kind
+EXERCISE_COLUMNS = {
+    'id': 'string',
+    'title': 'string',
+    'content': 'string',
+    'source_file': 'string',
+    'chapter': 'string',
+    'section': 'string',
+    'start_line': 'int32',
+    'end_line': 'int32',
+    'status': 'dictionary',
+    'extraction_method': 'dictionary',
+    'extraction_confidence': 'float64',
+    'extraction_timestamp': 'int64',
+    'content_hash': 'uint64',
+    'solution_start': 'int64',
+    'solution_count': 'int32',
+}
+
+SOLUTION_COLUMNS = {
+    'exercise_index': 'int32',
+    'content': 'string',
+    'status': 'dictionary',
+    'model_name': 'dictionary',
+    'proof_comment': 'string',  # JSON-encoded list
+    'timestamp': 'int64',
+}
+
+TABLES = {'exercises': EXERCISE_COLUMNS, 'solutions': SOLUTION_COLUMNS}
+
+# Fixed dictionaries keep enum codes stable across snapshots
+FIXED_DICTIONARIES = {
+    ('exercises', 'status'): [s.value for s in ExerciseStatus],
+    ('solutions', 'status'): [s.value for s in SolutionStatus],
+}
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("Columnar snapshots require numpy (pip install numpy)")
+
+
+def _timestamp_us(value: Union[datetime, str, None]) -> int:
+    """Microseconds since the epoch, or -1 if missing."""
+    if value is None:
+        return -1
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp() * 1_000_000)
+
+
+def _content_hash(record: Dict[str, Any]) -> int:
+    """Stable 64-bit hash of the extracted fields, used for diffing."""
+    digest = hashlib.blake2b(digest_size=8)
+    for key in ('title', 'content', 'source_file', 'extraction_method'):
+        digest.update(str(record.get(key) or '').encode('utf-8'))
+        digest.update(b'\0')
+    return int.from_bytes(digest.digest(), 'little')
+
+
+def _as_record(exercise: Union[Exercise, Dict[str, Any]]) -> Dict[str, Any]:
+    """Exercise or exercise dictionary (as in Exercise.to_dict) -> dictionary."""
+    if isinstance(exercise, Exercise):
+        return exercise.to_dict()
+    return exercise
+
+
+def _record_sort_key(record: Dict[str, Any]):
+    """Deterministic row order, also for records sharing an ID."""
+    return (record['id'], record.get('source_file') or '', record.get('extraction_method') or '',
+            record.get('content') or '')
+
+
+def _build_columns(exercises: Iterable[Union[Exercise, Dict[str, Any]]]) -> Dict[str, Dict[str, list]]:
+    """Flatten exercises into plain Python column lists, sorted by exercise ID."""
+    records = sorted((_as_record(ex) for ex in exercises), key=_record_sort_key)
+
+    columns = {table: {name: [] for name in spec} for table, spec in TABLES.items()}
+    ex_cols = columns['exercises']
+    sol_cols = columns['solutions']
+
+    for index, record in enumerate(records):
+        solutions = record.get('solutions') or []
+
+        ex_cols['id'].append(record['id'])
+        ex_cols['title'].append(record.get('title') or '')
+        ex_cols['content'].append(record.get('content') or '')
+        ex_cols['source_file'].append(record.get('source_file') or '')
+        ex_cols['chapter'].append(record.get('chapter') or '')
+        ex_cols['section'].append(record.get('section') or '')
+        ex_cols['start_line'].append(record['start_line'] if record.get('start_line') is not None else -1)
+        ex_cols['end_line'].append(record['end_line'] if record.get('end_line') is not None else -1)
+        ex_cols['status'].append(record.get('status') or ExerciseStatus.NOT_STARTED.value)
+        ex_cols['extraction_method'].append(record.get('extraction_method') or 'unknown')
+        # Records written before confidence was serialized have none; NaN keeps them out of statistics
+        confidence = record.get('extraction_confidence')
+        ex_cols['extraction_confidence'].append(float(confidence) if confidence is not None else float('nan'))
+        ex_cols['extraction_timestamp'].append(_timestamp_us(record.get('extraction_timestamp')))
+        ex_cols['content_hash'].append(_content_hash(record))
+        ex_cols['solution_start'].append(len(sol_cols['exercise_index']))
+        ex_cols['solution_count'].append(len(solutions))
+
+        for solution in solutions:
+            sol_cols['exercise_index'].append(index)
+            sol_cols['content'].append(solution.get('content') or '')
+            sol_cols['status'].append(solution.get('status') or SolutionStatus.ATTEMPT.value)
+            sol_cols['model_name'].append(solution.get('model_name') or '')
+            sol_cols['proof_comment'].append(json.dumps(solution.get('proof_comment') or [], ensure_ascii=False))
+            sol_cols['timestamp'].append(_timestamp_us(solution.get('timestamp')))
+
+    return columns
+
+
+def _dictionary_encode(table: str, name: str, values: List[str]):
+    """Return (codes, dictionary) for a dictionary-encoded column."""
+    dictionary = list(FIXED_DICTIONARIES.get((table, name), []))
+    dictionary += sorted(set(values) - set(dictionary))
+    lookup = {value: code for code, value in enumerate(dictionary)}
+    codes = np.fromiter((lookup[v] for v in values), dtype=np.int32, count=len(values))
+    return codes, dictionary
+
+
+def write_snapshot(exercises: Iterable[Union[Exercise, Dict[str, Any]]], path: Path,
+                   layout: str = "auto") -> Path:
+    """
+    Write a columnar snapshot of exercises and their solutions to a directory.
+
+    Accepts Exercise objects or exercise dictionaries (e.g. loaded from the
+    per-exercise JSON files). layout is "arrow", "numpy" or "auto", which
+    picks Arrow when pyarrow is installed.
+    """
+    _require_numpy()
+    if layout == "auto":
+        layout = "arrow" if pa is not None else "numpy"
+    if layout == "arrow" and pa is None:
+        raise ImportError("The arrow snapshot layout requires pyarrow (pip install pyarrow)")
+    if layout not in ("arrow", "numpy"):
+        raise ValueError(f"Unknown snapshot layout: {layout}")
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    columns = _build_columns(exercises)
+
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'layout': layout,
+        'rows': {table: len(cols['exercise_index' if table == 'solutions' else 'id'])
+                 for table, cols in columns.items()},
+        'dictionaries': {},
+    }
+
+    for table, spec in TABLES.items():
+        arrays = {}
+        for name, kind in spec.items():
+            values = columns[table][name]
+            if kind == 'dictionary':
+                codes, dictionary = _dictionary_encode(table, name, values)
+                meta['dictionaries'][f"{table}.{name}"] = dictionary
+                arrays[name] = (codes, dictionary)
+            elif kind == 'string':
+                arrays[name] = values
+            else:
+                arrays[name] = np.array(values, dtype=kind)
+
+        if layout == "arrow":
+            _write_arrow_table(path / f"{table}.arrow", spec, arrays)
+        else:
+            _write_numpy_table(path, table, spec, arrays)
+
+    with open(path / META_FILE, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, sort_keys=True, ensure_ascii=False)
+
+    return path
+
+
+def _write_arrow_table(file_path: Path, spec: Dict[str, str], arrays: Dict[str, Any]) -> None:
+    fields = []
+    for name, kind in spec.items():
+        value = arrays[name]
+        if kind == 'dictionary':
+            codes, dictionary = value
+            fields.append((name, pa.DictionaryArray.from_arrays(
+                pa.array(codes, type=pa.int32()), pa.array(dictionary, type=pa.string()))))
+        elif kind == 'string':
+            # large_string keeps 64-bit offsets for big corpora
+            fields.append((name, pa.array(value, type=pa.large_string())))
+        else:
+            fields.append((name, pa.array(value)))
+
+    table = pa.table(dict(fields))
+    with pa.OSFile(str(file_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _write_numpy_table(path: Path, table: str, spec: Dict[str, str], arrays: Dict[str, Any]) -> None:
+    for name, kind in spec.items():
+        prefix = path / f"{table}.{name}"
+        value = arrays[name]
+        if kind == 'dictionary':
+            np.save(f"{prefix}.codes.npy", value[0])
+        elif kind == 'string':
+            encoded = [s.encode('utf-8') for s in value]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+            np.save(f"{prefix}.offsets.npy", offsets)
+            with open(f"{prefix}.data.bin", 'wb') as f:
+                f.write(b''.join(encoded))
+        else:
+            np.save(f"{prefix}.npy", value)
+
+
+class StringColumn:
+    """Read-only view of a text column; values are decoded only when accessed."""
+
+    def __init__(self, offsets=None, data=None, arrow_array=None):
+        self._offsets = offsets
+        self._data = data
+        self._arrow = arrow_array
+
+    def __len__(self) -> int:
+        if self._arrow is not None:
+            return len(self._arrow)
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if self._arrow is not None:
+            return self._arrow[index].as_py()
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return bytes(self._data[start:end]).decode('utf-8')
+
+    def to_list(self) -> List[str]:
+        if self._arrow is not None:
+            return self._arrow.to_pylist()
+        return [self[i] for i in range(len(self))]
+
+
+class CorpusSnapshot:
+    """
+    Memory-mapped snapshot with vectorized aggregate queries.
+
+    Numeric columns and dictionary codes are NumPy arrays backed by the
+    snapshot files; text columns are StringColumn views.
+    """
+
+    def __init__(self, path: Path, meta: Dict[str, Any], columns: Dict[str, Dict[str, Any]]):
+        self.path = path
+        self.meta = meta
+        self.dictionaries: Dict[str, List[str]] = meta['dictionaries']
+        self.exercises = columns['exercises']
+        self.solutions = columns['solutions']
+
+    @classmethod
+    def load(cls, path: Path) -> 'CorpusSnapshot':
+        """Open a snapshot directory written by write_snapshot."""
+        _require_numpy()
+        path = Path(path)
+        with open(path / META_FILE, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        if meta.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {meta.get('version')}")
+
+        if meta['layout'] == 'arrow':
+            if pa is None:
+                raise ImportError("This snapshot uses the arrow layout, which requires pyarrow")
+            columns = {table: cls._load_arrow_table(path / f"{table}.arrow", spec)
+                       for table, spec in TABLES.items()}
+        else:
+            columns = {table: cls._load_numpy_table(path, table, spec, meta['rows'][table])
+                       for table, spec in TABLES.items()}
+
+        return cls(path, meta, columns)
+
+    @staticmethod
+    def _load_arrow_table(file_path: Path, spec: Dict[str, str]) -> Dict[str, Any]:
+        source = pa.memory_map(str(file_path), 'r')
+        table = pa.ipc.open_file(source).read_all()
+
+        columns = {}
+        for name, kind in spec.items():
+            array = table.column(name).combine_chunks()
+            if kind == 'dictionary':
+                columns[name] = array.indices.to_numpy(zero_copy_only=False)
+            elif kind == 'string':
+                columns[name] = StringColumn(arrow_array=array)
+            else:
+                columns[name] = array.to_numpy(zero_copy_only=False)
+        return columns
+
+    @staticmethod
+    def _load_numpy_table(path: Path, table: str, spec: Dict[str, str], rows: int) -> Dict[str, Any]:
+        columns = {}
+        for name, kind in spec.items():
+            prefix = path / f"{table}.{name}"
+            if kind == 'dictionary':
+                columns[name] = np.load(f"{prefix}.codes.npy", mmap_mode='r')
+            elif kind == 'string':
+                offsets = np.load(f"{prefix}.offsets.npy", mmap_mode='r')
+                data_file = Path(f"{prefix}.data.bin")
+                # np.memmap cannot map an empty file
+                data = np.memmap(data_file, dtype=np.uint8, mode='r') if data_file.stat().st_size else b''
+                columns[name] = StringColumn(offsets=offsets, data=data)
+            else:
+                columns[name] = np.load(f"{prefix}.npy", mmap_mode='r')
+        return columns
+
+    @property
+    def num_exercises(self) -> int:
+        return self.meta['rows']['exercises']
+
+    @property
+    def num_solutions(self) -> int:
+        return self.meta['rows']['solutions']
+
+    def count_by(self, table: str, column: str, mask=None) -> Dict[str, int]:
+        """Row counts per value of a dictionary-encoded column, e.g. ('solutions', 'model_name')."""
+        dictionary = self.dictionaries[f"{table}.{column}"]
+        codes = getattr(self, table)[column]
+        if mask is not None:
+            codes = codes[mask]
+        counts = np.bincount(codes, minlength=len(dictionary))
+        return {value: int(count) for value, count in zip(dictionary, counts) if count}
+
+    def solution_counts_by_model(self, status: Optional[SolutionStatus] = None) -> Dict[str, int]:
+        """Number of solutions per model, optionally only those with a given status."""
+        mask = None
+        if status is not None:
+            mask = self.solutions['status'] == self._code('solutions', 'status', status.value)
+        return self.count_by('solutions', 'model_name', mask)
+
+    def confidence_histogram(self, bins: int = 10) -> Dict[str, List[float]]:
+        """Histogram of extraction confidence over [0, 1], skipping exercises without one."""
+        confidence = self.exercises['extraction_confidence']
+        counts, edges = np.histogram(confidence[~np.isnan(confidence)], bins=bins, range=(0.0, 1.0))
+        return {'counts': counts.tolist(), 'edges': edges.tolist()}
+
+    def mean_confidence_by_method(self) -> Dict[str, float]:
+        """Mean extraction confidence per extraction method, skipping exercises without one."""
+        dictionary = self.dictionaries['exercises.extraction_method']
+        confidence = self.exercises['extraction_confidence']
+        known = ~np.isnan(confidence)
+        codes = self.exercises['extraction_method'][known]
+        sums = np.bincount(codes, weights=confidence[known], minlength=len(dictionary))
+        counts = np.bincount(codes, minlength=len(dictionary))
+        return {value: float(s / c) for value, s, c in zip(dictionary, sums, counts) if c}
+
+    def diff(self, other: 'CorpusSnapshot') -> Dict[str, List[str]]:
+        """
+        Compare exercises and their extracted content with another snapshot.
+
+        Exercises are matched on (id, source_file); records sharing both
+        (e.g. a deterministic and a user-entered 1.1.A) are matched in row
+        order. Returns the (id, source_file) pairs that were added, removed or
+        changed going from other to self; source_file is None when unknown.
+        """
+        mine = self._hashes_by_record()
+        theirs = other._hashes_by_record()
+
+        def pairs(keys):
+            # The same ID may appear with and without a source file
+            return sorted((k[:2] for k in keys), key=lambda pair: (pair[0], pair[1] or ''))
+
+        return {
+            'added': pairs(mine.keys() - theirs.keys()),
+            'removed': pairs(theirs.keys() - mine.keys()),
+            'changed': pairs(k for k in mine.keys() & theirs.keys() if mine[k] != theirs[k]),
+        }
+
+    def _hashes_by_record(self) -> Dict[tuple, int]:
+        """Content hash per (id, source_file, occurrence)."""
+        hashes = {}
+        occurrences: Dict[tuple, int] = {}
+        records = zip(self.exercises['id'].to_list(), self.exercises['source_file'].to_list(),
+                      self.exercises['content_hash'].tolist())
+        for exercise_id, source_file, content_hash in records:
+            key = (exercise_id, source_file or None)
+            occurrence = occurrences.get(key, 0)
+            occurrences[key] = occurrence + 1
+            hashes[key + (occurrence,)] = content_hash
+        return hashes
+
+    def _code(self, table: str, column: str, value: str) -> int:
+        """Dictionary code of a value, or -1 if it never occurs."""
+        try:
+            return self.dictionaries[f"{table}.{column}"].index(value)
+        except ValueError:
+            return -1
@@ -8,10 +8,12 @@ from .parsing_exercises import (
     AgentBasedExerciseExtractor, 
     HybridExerciseExtractor
 )
+from .streaming_json import StreamingExerciseParser
 
 __all__ = [
     'Exercise',
     'DeterministicExerciseExtractor',
     'AgentBasedExerciseExtractor',
-    'HybridExerciseExtractor'
+    'HybridExerciseExtractor',
+    'StreamingExerciseParser'
 ]
\ No newline at end of file
@@ -6,16 +6,17 @@ for extracting exercises from LaTeX mathematical texts.
 """
 
 import re
-import json
 import sys
 import os
-from typing import List, Dict, Optional, Tuple
+from bisect import bisect_left
+from typing import Iterator, List, Dict, Optional, Tuple
 from pathlib import Path
 
 # Add project root to path for imports
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from together import Together
 from src.models import Exercise
+from src.parsing.streaming_json import StreamingExerciseParser
 
 
 class DeterministicExerciseExtractor:
@@ -39,14 +40,22 @@ class DeterministicExerciseExtractor:
             (r'\\subsubsection\*\{([^}]*[Ee]xercise[^}]*)\}(.*?)(?=\\subsubsection|\\section|\\subsection|\Z)', 
              "general_exercise")
         ]
+        
+        # Compile once so a long-lived extractor (e.g. the watcher) stays warm
+        self.compiled_patterns = [
+            (re.compile(pattern, re.DOTALL | re.IGNORECASE), pattern_name)
+            for pattern, pattern_name in self.exercise_patterns
+        ]
     
     def extract_exercises(self, latex_content: str) -> List[Exercise]:
         """Extract exercises using deterministic patterns."""
         exercises = []
-        lines = latex_content.split('\n')
         
-        for pattern, pattern_name in self.exercise_patterns:
-            matches = re.finditer(pattern, latex_content, re.DOTALL | re.IGNORECASE)
+        # Offsets of each newline, for line lookups without rescanning the prefix
+        newline_offsets = [m.start() for m in re.finditer('\n', latex_content)]
+        
+        for pattern, pattern_name in self.compiled_patterns:
+            matches = pattern.finditer(latex_content)
             
             for match in matches:
                 # Handle different pattern types
@@ -71,8 +80,8 @@ class DeterministicExerciseExtractor:
                 # Find line numbers
                 start_pos = match.start()
                 end_pos = match.end()
-                start_line = latex_content[:start_pos].count('\n') + 1
-                end_line = latex_content[:end_pos].count('\n') + 1
+                start_line = bisect_left(newline_offsets, start_pos) + 1
+                end_line = bisect_left(newline_offsets, end_pos) + 1
                 
                 exercise = Exercise(
                     id=exercise_id,
@@ -138,34 +147,55 @@ class DeterministicExerciseExtractor:
 class AgentBasedExerciseExtractor:
     """Extracts exercises using LLM agent."""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, client=None):
         self.api_key = api_key or "tgp_v1_0ljNvqYPTMCc1_VLyNCCUj2Jg3v3P8-lmgOBRYMHJ1c"
-        self.client = Together(api_key=self.api_key)
+        # An existing client can be shared across extractors (e.g. by the extraction service)
+        self.client = client or Together(api_key=self.api_key)
         self.model = "meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo"
+        # Error from the most recent model call, or None if it succeeded
+        self.last_error: Optional[str] = None
     
     def extract_exercises(self, latex_content: str) -> List[Exercise]:
         """Extract exercises using LLM agent."""
+        return list(self.stream_exercises(latex_content))
+    
+    def stream_exercises(self, latex_content: str) -> Iterator[Exercise]:
+        """
+        Extract exercises using LLM agent, yielding each one as soon as the
+        model has finished writing it.
+        """
         prompt = self._create_extraction_prompt()
+        parser = StreamingExerciseParser()
+        self.last_error = None
         
         try:
-            response = self.client.chat.completions.create(
+            stream = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": prompt},
                     {"role": "user", "content": f"Extract all exercises from this LaTeX content:\n\n{latex_content}"}
                 ],
                 temperature=0.1,  # Low temperature for consistency
-                max_tokens=4000
+                max_tokens=4000,
+                stream=True
             )
             
-            result_text = response.choices[0].message.content
-            exercises = self._parse_agent_response(result_text, latex_content)
-            
-            return exercises
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                for ex_data in parser.feed(text):
+                    yield self._exercise_from_data(ex_data, latex_content)
             
         except Exception as e:
             print(f"Agent extraction failed: {e}")
-            return []
+            self.last_error = str(e) or type(e).__name__
+        
+        # Whatever the model left unfinished (e.g. hit max_tokens)
+        for ex_data in parser.close():
+            yield self._exercise_from_data(ex_data, latex_content, partial=True)
     
     def _create_extraction_prompt(self) -> str:
         """Create extraction prompt for the LLM."""
@@ -200,79 +230,27 @@ Return your results in this EXACT JSON format:
 
 Be thorough and capture ALL exercises. Include the complete exercise text, not summaries."""
     
-    def _parse_agent_response(self, response_text: str, original_content: str) -> List[Exercise]:
-        """Parse the agent's JSON response into Exercise objects."""
-        exercises = []
-        
-        try:
-            # Extract JSON from response (handle cases where agent adds extra text)
-            json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-            if json_match:
-                json_text = json_match.group(1)
-            else:
-                # Try to find JSON without markdown formatting
-                json_text = response_text
-            
-            # Fix common JSON escape issues in LaTeX content
-            json_text = json_text.replace('\\\\', '\\\\\\\\')  # Fix LaTeX double backslashes
-            json_text = json_text.replace('\\"', '\\\\"')      # Fix escaped quotes
-            json_text = json_text.replace('\\{', '\\\\{')      # Fix LaTeX braces
-            json_text = json_text.replace('\\}', '\\\\}')      # Fix LaTeX braces
-            
-            # Parse JSON
-            data = json.loads(json_text)
-            
-            for ex_data in data.get("exercises", []):
-                # Find line numbers by searching for content in original
-                start_line, end_line = self._find_line_numbers(
-                    ex_data.get("content", ""), original_content
-                )
-                
-                exercise = Exercise(
-                    id=ex_data.get("id", "unknown"),
-                    title=ex_data.get("title", ""),
-                    content=ex_data.get("content", ""),
-                    start_line=start_line,
-                    end_line=end_line,
-                    extraction_method="agent_based",
-                    extraction_confidence=ex_data.get("confidence", 0.8)
-                )
-                exercises.append(exercise)
-                
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse agent response as JSON: {e}")
-            # Try to extract exercises using fallback regex parsing
-            exercises = self._fallback_parse_agent_response(response_text)
-            
-        except Exception as e:
-            print(f"Error parsing agent response: {e}")
-        
-        return exercises
-    
-    def _fallback_parse_agent_response(self, response_text: str) -> List[Exercise]:
-        """Fallback parsing when JSON fails."""
-        exercises = []
+    def _exercise_from_data(self, ex_data: Dict, original_content: str, partial: bool = False) -> Exercise:
+        """Build an Exercise from one parsed exercise object."""
+        content = str(ex_data.get("content", ""))
         
-        # Look for exercise patterns in the response text
-        exercise_patterns = [
-            r'"id":\s*"([^"]+)".*?"title":\s*"([^"]+)".*?"content":\s*"([^"]+(?:[^"\\]|\\.)*)"',
-            r'Exercise\s+(\d+\.\d+\.[A-Z])[:\s]+([^\n]+)'
-        ]
+        # Find line numbers by searching for content in original
+        start_line, end_line = self._find_line_numbers(content, original_content)
         
-        for pattern in exercise_patterns:
-            matches = re.finditer(pattern, response_text, re.DOTALL | re.IGNORECASE)
-            for match in matches:
-                if len(match.groups()) >= 3:
-                    exercise = Exercise(
-                        id=match.group(1),
-                        title=match.group(2),
-                        content=match.group(3),
-                        extraction_method="agent_based_fallback",
-                        extraction_confidence=0.6
-                    )
-                    exercises.append(exercise)
+        confidence = ex_data.get("confidence", 0.8)
+        if not isinstance(confidence, (int, float)):
+            confidence = 0.8
         
-        return exercises
+        return Exercise(
+            id=str(ex_data.get("id", "unknown")),
+            title=str(ex_data.get("title", "")),
+            content=content,
+            start_line=start_line,
+            end_line=end_line,
+            # Truncated output may have cut the content short
+            extraction_method="agent_based_partial" if partial else "agent_based",
+            extraction_confidence=min(confidence, 0.6) if partial else confidence
+        )
     
     def _find_line_numbers(self, content: str, original_content: str) -> Tuple[Optional[int], Optional[int]]:
         """Find approximate line numbers for content in original text."""
@@ -296,12 +274,16 @@ Be thorough and capture ALL exercises. Include the complete exercise text, not s
 class HybridExerciseExtractor:
     """Combines deterministic and agent-based approaches."""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, client=None):
         self.deterministic = DeterministicExerciseExtractor()
-        self.agent = AgentBasedExerciseExtractor(api_key)
+        self.agent = AgentBasedExerciseExtractor(api_key, client=client)
+        # Set when the last extraction fell back to deterministic results because the agent failed
+        self.agent_error: Optional[str] = None
     
     def extract_exercises(self, latex_content: str, use_agent: bool = True) -> List[Exercise]:
         """Extract exercises using hybrid approach."""
+        self.agent_error = None
+        
         # Step 1: Deterministic extraction
         deterministic_exercises = self.deterministic.extract_exercises(latex_content)
         
@@ -310,6 +292,7 @@ class HybridExerciseExtractor:
         
         # Step 2: Agent-based extraction
         agent_exercises = self.agent.extract_exercises(latex_content)
+        self.agent_error = self.agent.last_error
         
         # Step 3: Merge and deduplicate
         all_exercises = deterministic_exercises + agent_exercises
@@ -0,0 +1,392 @@
+"""
+Local extraction service.
+
+Serves exercise extraction over HTTP on a TCP port or a Unix socket, so that
+solver workers, the review UI and batch jobs share warm extractors and model
+clients instead of each building their own. Concurrent identical requests are
+coalesced into a single computation and results are kept in a shared cache.
+
+Run with:
+    python -m src.parsing.service --socket /tmp/rising-sea-extract.sock
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import queue
+import socket
+import socketserver
+import stat
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.parsing.parsing_exercises import HybridExerciseExtractor
+
+
+class SingleFlight:
+    """Runs at most one computation per key; concurrent callers share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, shared), where shared is True if another caller computed it."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class LRUCache:
+    """Small thread-safe LRU cache."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class ExtractionService:
+    """Pool of warm extractors behind a single-flight cache."""
+
+    def __init__(self, extractor_factory: Callable[[], HybridExerciseExtractor] = None,
+                 pool_size: int = 4, cache_size: int = 256):
+        self.extractor_factory = extractor_factory or HybridExerciseExtractor
+        self._pool: queue.Queue = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self.extractor_factory())
+
+        self.cache = LRUCache(cache_size)
+        self.single_flight = SingleFlight()
+
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'computed': 0, 'agent_failures': 0}
+
+    def extract(self, latex_content: str, use_agent: bool = True) -> bytes:
+        """
+        Extract exercises and return the JSON response body.
+
+        Results are cached as serialized bytes, so cache hits and coalesced
+        callers never touch the extractors. The body's "agent" field is "ok",
+        "failed" (with "agent_error"; only deterministic results, not cached)
+        or "disabled".
+        """
+        key = self._cache_key(latex_content, use_agent)
+        self._count('requests')
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._count('cache_hits')
+            return cached
+
+        body, shared = self.single_flight.do(key, lambda: self._compute(key, latex_content, use_agent))
+        if shared:
+            self._count('coalesced')
+        return body
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['cache_entries'] = len(self.cache)
+        return stats
+
+    def _compute(self, key: str, latex_content: str, use_agent: bool) -> bytes:
+        """Run one extraction on a pooled extractor and cache the result."""
+        # A previous leader may have finished between our cache miss and taking the lead
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._count('cache_hits')
+            return cached
+
+        self._count('computed')
+        with self._checkout() as extractor:
+            exercises = extractor.extract_exercises(latex_content, use_agent=use_agent)
+            agent_error = extractor.agent_error
+
+        response = {'exercises': [exercise.to_dict() for exercise in exercises]}
+        if not use_agent:
+            response['agent'] = 'disabled'
+        elif agent_error is None:
+            response['agent'] = 'ok'
+        else:
+            response['agent'] = 'failed'
+            response['agent_error'] = agent_error
+        body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+
+        # Results without the agent's exercises are not cached, so the next request retries
+        if agent_error is None:
+            self.cache.put(key, body)
+        else:
+            self._count('agent_failures')
+        return body
+
+    @contextmanager
+    def _checkout(self):
+        extractor = self._pool.get()
+        try:
+            yield extractor
+        finally:
+            self._pool.put(extractor)
+
+    def _cache_key(self, latex_content: str, use_agent: bool) -> str:
+        digest = hashlib.sha256(latex_content.encode('utf-8')).hexdigest()
+        return f"{digest}:{int(use_agent)}"
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.stats[name] += 1
+
+
+class ExtractionRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /extract  {"latex": "...", "use_agent": true}  ->  {"exercises": [...], "agent": "ok"}
+    GET  /stats                                         ->  service counters
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # Headers and body go out in separate writes; without TCP_NODELAY every
+        # response waits on Nagle plus delayed ACK. Unix sockets have no such option.
+        self.disable_nagle_algorithm = isinstance(self.client_address, tuple)
+        super().setup()
+
+    def do_POST(self):
+        if self.path != '/extract':
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', -1))
+            if length < 0:
+                # rfile.read(-1) would block until the client disconnects
+                raise ValueError("a non-negative Content-Length is required")
+            payload = json.loads(self.rfile.read(length).decode('utf-8'))
+            if not isinstance(payload, dict):
+                raise ValueError("request body must be a JSON object")
+            latex_content = payload['latex']
+            if not isinstance(latex_content, str):
+                raise ValueError("'latex' must be a string")
+            use_agent = payload.get('use_agent', True)
+            if not isinstance(use_agent, bool):
+                raise ValueError("'use_agent' must be a boolean")
+        except (ValueError, KeyError, UnicodeDecodeError) as e:
+            self._send_json(400, {'error': f"Invalid request: {e}"})
+            return
+
+        try:
+            body = self.server.service.extract(latex_content, use_agent=use_agent)
+        except Exception as e:
+            self._send_json(500, {'error': f"Extraction failed: {e}"})
+            return
+
+        self._send(200, body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send_json(200, self.server.service.get_stats())
+        else:
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+
+    def address_string(self):
+        # Unix socket peers have no host/port
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return 'unix'
+
+    def log_message(self, format, *args):
+        if not getattr(self.server, 'quiet', False):
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, data: Dict) -> None:
+        self._send(status, json.dumps(data).encode('utf-8'))
+
+    def _send(self, status: int, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server listening on a Unix domain socket."""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        # Replace a stale socket left by a previous run, but nothing else
+        if _is_stale_socket(self.server_address):
+            os.unlink(self.server_address)
+        super().server_bind()
+
+
+def _is_stale_socket(path: str) -> bool:
+    """True if path is a socket file that no server is listening on."""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return False
+    if not stat.S_ISSOCK(mode):
+        return False
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        return True
+    finally:
+        probe.close()
+    return False
+
+
+def create_server(service: ExtractionService, host: str = '127.0.0.1', port: int = 8765,
+                  socket_path: Optional[str] = None, quiet: bool = False):
+    """Create a threaded HTTP server for the service (Unix socket if socket_path is given)."""
+    if socket_path:
+        server = ThreadingUnixHTTPServer(socket_path, ExtractionRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ExtractionRequestHandler)
+    server.service = service
+    server.quiet = quiet
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ExtractionServiceClient:
+    """Client for tools that want extraction results from a running service."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765,
+                 socket_path: Optional[str] = None, timeout: float = 300.0):
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def extract(self, latex_content: str, use_agent: bool = True) -> List[Dict]:
+        """Extract exercises, returning their dictionaries (as in Exercise.to_dict)."""
+        body = json.dumps({'latex': latex_content, 'use_agent': use_agent}).encode('utf-8')
+        data = self._request('POST', '/extract', body)
+        if data.get('agent') == 'failed':
+            print(f"Agent extraction failed on the service: {data.get('agent_error')}")
+        return data['exercises']
+
+    def stats(self) -> Dict[str, int]:
+        return self._request('GET', '/stats')
+
+    def _request(self, method: str, path: str, body: bytes = None) -> Dict:
+        connection = self._connection()
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = json.loads(response.read().decode('utf-8'))
+        except (OSError, http.client.HTTPException):
+            # Drop the kept-alive connection so the next call reconnects
+            connection.close()
+            self._local.connection = None
+            raise
+
+        if response.status != 200:
+            raise RuntimeError(f"Extraction service error {response.status}: {data.get('error')}")
+        return data
+
+    def _connection(self) -> http.client.HTTPConnection:
+        # One kept-alive connection per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self.socket_path:
+                connection = _UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+            else:
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.connection = connection
+        return connection
+
+
+def main():
+    """Run the extraction service until interrupted."""
+    parser = argparse.ArgumentParser(description="Local exercise extraction service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', dest='socket_path', help="Listen on a Unix socket instead of TCP")
+    parser.add_argument('--pool-size', type=int, default=4, help="Number of warm extractors")
+    parser.add_argument('--cache-size', type=int, default=256, help="Number of cached documents")
+    args = parser.parse_args()
+
+    service = ExtractionService(pool_size=args.pool_size, cache_size=args.cache_size)
+    server = create_server(service, args.host, args.port, args.socket_path)
+
+    address = args.socket_path or f"http://{args.host}:{args.port}"
+    print(f"Extraction service listening on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket_path and os.path.exists(args.socket_path):
+            os.unlink(args.socket_path)
+
+
+if __name__ == "__main__":
+    main()
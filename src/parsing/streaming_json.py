@@ -0,0 +1,424 @@
+"""
+Incremental JSON parser for LLM extraction responses.
+
+Consumes model output chunk by chunk and emits each exercise object as soon
+as its closing brace arrives. It is tolerant of what models actually produce:
+
+- prose and markdown fences around the JSON are skipped
+- raw LaTeX backslashes inside strings (\\frac, \\mathcal, \\{) are kept
+  literally instead of being read as JSON escapes
+- unescaped quotes inside strings, trailing commas and truncated output are
+  recovered from
+
+Each exercise object is first decoded strictly with json.loads; the tolerant
+decoding is only used when that fails or the object contains raw LaTeX. In
+tolerant decoding \b or \f before a letter is always LaTeX (\bigvee, \frac),
+and \n, \r or \t before a lowercase letter is LaTeX (\nexists, \rvert) only
+if the same object has other raw LaTeX; such objects are decoded a second
+time once that is known. Every character is examined a bounded number of
+times, so parsing is linear in the length of the response.
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+
+# Next character that ends the plain run inside a string
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+# Characters that may follow a closing quote in valid JSON
+_AFTER_STRING = ',:}]'
+
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+_HEX_DIGITS = set('0123456789abcdefABCDEF')
+
+_JSON_ESCAPES = {'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+# LaTeX control words that start like a JSON escape (\b, \f, \n, \r, \t) and
+# are kept as LaTeX even in an object with no other raw LaTeX.
+LATEX_ESCAPE_COLLISIONS = frozenset([
+    # \b
+    'backslash', 'bar', 'beta', 'begin', 'bf', 'big', 'bigcap', 'bigcup', 'bigl', 'bigoplus',
+    'bigotimes', 'bigr', 'bigsqcup', 'bigwedge', 'binom', 'bmod', 'boldsymbol', 'bot', 'boxtimes',
+    'bullet',
+    # \f
+    'fbox', 'flat', 'footnote', 'forall', 'frac', 'frak', 'frown',
+    # \n
+    'nLeftarrow', 'nLeftrightarrow', 'nRightarrow', 'nabla', 'natural', 'ne', 'neg', 'neq',
+    'newcommand', 'newline', 'ngeq', 'ni', 'nleq', 'nmid', 'noindent', 'not', 'notin', 'nsubseteq',
+    'nu',
+    # \r
+    'rangle', 'rceil', 'ref', 'rfloor', 'rho', 'right', 'rightarrow', 'rightleftarrows', 'rm',
+    # \t
+    'tan', 'tanh', 'tau', 'text', 'textbf', 'textit', 'textrm', 'tfrac', 'theta', 'tilde', 'times',
+    'to', 'top', 'triangle', 'triangleleft', 'triangleright',
+])
+
+_MAX_CONTROL_WORD = max(len(word) for word in LATEX_ESCAPE_COLLISIONS)
+
+
+class StreamingExerciseParser:
+    """
+    Incremental parser that yields exercise dictionaries from streamed text.
+
+    An exercise is a JSON object with an "id" key and a "content" or "title"
+    key that is either an element of the "exercises" array, an element of a
+    top-level array, or itself a top-level object. Nested objects (e.g.
+    sub-parts of an exercise) stay inside their exercise.
+    """
+
+    def __init__(self, assume_latex: bool = False):
+        # With assume_latex, \n, \r and \t before a lowercase letter are always LaTeX
+        self.assume_latex = assume_latex
+        self._carry = ""  # Unprocessed tail, at most a few characters
+        self._reset()
+
+    def feed(self, chunk: str) -> List[dict]:
+        """Consume a chunk of output; return exercises completed by it."""
+        return self._consume(self._carry + chunk, final=False)
+
+    def close(self) -> List[dict]:
+        """
+        Finish the stream; return exercises cut off by truncated output.
+
+        Partial objects are returned only if they already have an id and some
+        content. Their last string value may be incomplete.
+        """
+        completed = self._consume(self._carry, final=True)
+        self._carry = ""
+
+        # Flush a string whose closing quote was followed by end of input
+        if self._state == 'after_string':
+            self._finish_string()
+
+        # A string that was still open is kept as-is
+        if self._state == 'string':
+            self._add_value(''.join(self._string_parts))
+
+        partial = []
+        for index, (container, capture) in enumerate(zip(self._stack, self._captures)):
+            if capture is not None and isinstance(container, dict) and self._is_exercise(container):
+                if self._needs_latex_pass(index):
+                    container = self._decode_as_latex(''.join(capture), container)
+                partial.append(container)
+        self._reset()
+        return completed + partial
+
+    def _reset(self) -> None:
+        """Drop any partial structure and go back to searching for JSON."""
+        self._state = 'seek'
+        self._stack: List[Any] = []
+        self._keys: List[Optional[str]] = []  # Pending key for each dict on the stack
+        self._expect_key: List[bool] = []
+        self._container_keys: List[Optional[str]] = []  # Key each container is stored under
+        # Raw text of candidate exercise objects: parts from earlier chunks and start in the current one
+        self._captures: List[Optional[List[str]]] = []
+        self._capture_starts: List[int] = []
+        # Raw LaTeX backslashes, and \n, \r, \t before a letter that were read as
+        # escapes; counted so far, and as of when each container was opened
+        self._latex_marks = 0
+        self._ambiguous = 0
+        self._counts_at_push: List[Tuple[int, int]] = []
+        self._string_parts: List[str] = []
+        self._pending_ws = ""
+        self._token = ""
+
+    def _consume(self, text: str, final: bool) -> List[dict]:
+        completed: List[dict] = []
+        self._carry = ""
+        i = 0
+        n = len(text)
+
+        while i < n:
+            state = self._state
+
+            if state == 'string':
+                match = _STRING_SPECIAL.search(text, i)
+                if match is None:
+                    self._string_parts.append(text[i:])
+                    break
+                j = match.start()
+                if j > i:
+                    self._string_parts.append(text[i:j])
+                if text[j] == '"':
+                    self._state = 'after_string'
+                    self._pending_ws = ""
+                    i = j + 1
+                    continue
+
+                decoded, consumed = self._decode_escape(text, j, final)
+                if consumed == 0:
+                    # Not enough lookahead yet; retry with the next chunk
+                    self._carry = text[j:]
+                    break
+                self._string_parts.append(decoded)
+                i = j + consumed
+                continue
+
+            c = text[i]
+
+            if state == 'after_string':
+                if c.isspace():
+                    self._pending_ws += c
+                    i += 1
+                    continue
+                if c in _AFTER_STRING:
+                    self._finish_string()
+                    # Reprocess the delimiter in the structural state
+                    continue
+                # The quote was part of the text, not the end of the string
+                self._string_parts.append('"' + self._pending_ws)
+                self._pending_ws = ""
+                self._state = 'string'
+                continue
+
+            if state == 'token':
+                if c.isalnum() or c in '+-.':
+                    self._token += c
+                    i += 1
+                    continue
+                if not self._finish_token():
+                    self._reset()
+                    continue
+                self._state = 'value'
+                continue
+
+            if state == 'seek':
+                if c == '{' or c == '[':
+                    self._state = 'value'
+                    continue
+                i += 1
+                continue
+
+            # Structural state
+            i += 1
+            if c.isspace() or c == ',':
+                # Commas carry no information once values are tracked; this also
+                # tolerates trailing commas
+                if c == ',' and self._stack and isinstance(self._stack[-1], dict):
+                    self._expect_key[-1] = True
+                continue
+            if c == ':':
+                if self._stack and isinstance(self._stack[-1], dict) and self._keys[-1] is not None:
+                    self._expect_key[-1] = False
+                    continue
+                self._reset()
+                continue
+            if c == '{':
+                self._push({}, i - 1)
+                continue
+            if c == '[':
+                self._push([], i - 1)
+                continue
+            if c == '}' or c == ']':
+                if not self._stack or isinstance(self._stack[-1], dict) != (c == '}'):
+                    self._reset()
+                    continue
+                capture = self._captures[-1]
+                if capture is not None and isinstance(self._stack[-1], dict) and self._is_exercise(self._stack[-1]):
+                    raw = ''.join(capture) + text[self._capture_starts[-1]:i]
+                    completed.append(self._decode_object(raw, self._stack[-1], len(self._stack) - 1))
+                self._pop()
+                if not self._stack:
+                    # Top-level value finished; ignore whatever follows until more JSON
+                    self._reset()
+                continue
+            if c == '"':
+                self._state = 'string'
+                self._string_parts = []
+                continue
+            if c.isalnum() or c == '-':
+                if self._in_key_position():
+                    self._reset()
+                    continue
+                self._state = 'token'
+                self._token = c
+                continue
+
+            # Anything else means this was not JSON after all
+            self._reset()
+
+        if final and self._state == 'token':
+            if self._finish_token():
+                self._state = 'value'
+
+        # Keep the raw text of open candidate objects for the next chunk
+        consumed_end = n - len(self._carry)
+        for index, capture in enumerate(self._captures):
+            if capture is not None:
+                capture.append(text[self._capture_starts[index]:consumed_end])
+                self._capture_starts[index] = 0
+        return completed
+
+    def _decode_object(self, raw: str, tolerant: dict, index: int) -> dict:
+        """
+        Decode a completed exercise object from its raw text.
+
+        Valid JSON is decoded strictly, so escapes like \\n mean what they say,
+        unless it contains raw LaTeX that json.loads would misread (\\frac as a
+        form feed, \\nabla as a newline). Otherwise the tolerant decoding built
+        while streaming is used, redone if it read \\nexists-like commands as
+        escapes before the object turned out to contain LaTeX.
+        """
+        marks, _ = self._counts_at_push[index]
+        if self._latex_marks == marks:
+            try:
+                value = json.loads(raw)
+            except ValueError:
+                value = None
+            if isinstance(value, dict):
+                return value
+        if self._needs_latex_pass(index):
+            return self._decode_as_latex(raw, tolerant)
+        return tolerant
+
+    def _needs_latex_pass(self, index: int) -> bool:
+        """True if the container at index has raw LaTeX and escapes that may be LaTeX too."""
+        marks, ambiguous = self._counts_at_push[index]
+        return self._latex_marks != marks and self._ambiguous != ambiguous
+
+    def _decode_as_latex(self, raw: str, fallback: dict) -> dict:
+        """Decode one object's raw text again, reading \\n, \\r, \\t before a lowercase letter as LaTeX."""
+        parser = StreamingExerciseParser(assume_latex=True)
+        objects = parser.feed(raw) + parser.close()
+        return objects[0] if objects else fallback
+
+    def _decode_escape(self, text: str, j: int, final: bool):
+        """
+        Decode the backslash sequence at text[j].
+
+        Returns (decoded, consumed); consumed is 0 if more input is needed.
+        \\b and \\f before a letter and the words in LATEX_ESCAPE_COLLISIONS are
+        kept as LaTeX; \\n, \\r and \\t before any other lowercase letter are
+        escapes unless assume_latex is set.
+        """
+        n = len(text)
+        if j + 1 >= n:
+            return ('\\', 1) if final else ('', 0)
+
+        c = text[j + 1]
+        if c == '"':
+            return '"', 2
+        if c == '\\':
+            return '\\', 2
+        if c == '/':
+            return '/', 2
+
+        if c == 'u':
+            if j + 6 > n and not final:
+                return '', 0
+            digits = text[j + 2:j + 6]
+            if len(digits) == 4 and all(d in _HEX_DIGITS for d in digits):
+                return chr(int(digits, 16)), 6
+            # \underline, \upsilon and the like
+            self._latex_marks += 1
+            return '\\u', 2
+
+        if c in _JSON_ESCAPES:
+            # Read the whole control word, e.g. "nabla" in \nabla
+            k = j + 1
+            limit = min(n, j + 2 + _MAX_CONTROL_WORD)
+            while k < limit and text[k].isascii() and text[k].isalpha():
+                k += 1
+            if k == n and not final and k - j - 1 <= _MAX_CONTROL_WORD:
+                return '', 0
+            if k == j + 2:
+                # No letter follows, so this is an escape
+                return _JSON_ESCAPES[c], 2
+            if c in 'bf' or text[j + 1:k] in LATEX_ESCAPE_COLLISIONS:
+                # A backspace or form feed before a letter is never meant
+                self._latex_marks += 1
+                return '\\' + c, 2
+            if text[j + 2].islower():
+                if self.assume_latex:
+                    return '\\' + c, 2
+                self._ambiguous += 1
+            return _JSON_ESCAPES[c], 2
+
+        # Not a JSON escape: a raw LaTeX backslash
+        self._latex_marks += 1
+        return '\\' + c, 2
+
+    def _finish_string(self) -> None:
+        value = ''.join(self._string_parts)
+        self._string_parts = []
+        self._pending_ws = ""
+        self._state = 'value'
+        if self._in_key_position():
+            self._keys[-1] = value
+        else:
+            self._add_value(value)
+
+    def _finish_token(self) -> bool:
+        """Convert a bare token (number or literal); False if it is not valid JSON."""
+        token = self._token
+        self._token = ""
+        if token in _LITERALS:
+            self._add_value(_LITERALS[token])
+            return True
+        try:
+            value = int(token)
+        except ValueError:
+            try:
+                value = float(token)
+            except ValueError:
+                return False
+        self._add_value(value)
+        return True
+
+    def _in_key_position(self) -> bool:
+        return bool(self._stack) and isinstance(self._stack[-1], dict) and self._expect_key[-1]
+
+    def _push(self, container, position: int) -> None:
+        if self._in_key_position():
+            # Value without a key
+            self._reset()
+            self._state = 'value'
+            self._push(container, position)
+            return
+
+        parent_key = None
+        if self._stack and isinstance(self._stack[-1], dict):
+            parent_key = self._keys[-1]
+
+        # Exercise positions: top level, in a top-level array, or in "exercises"
+        candidate = isinstance(container, dict) and (
+            not self._stack
+            or (isinstance(self._stack[-1], list)
+                and (len(self._stack) == 1 or self._container_keys[-1] == 'exercises'))
+        )
+
+        self._stack.append(container)
+        self._keys.append(None)
+        self._expect_key.append(isinstance(container, dict))
+        self._container_keys.append(parent_key)
+        self._captures.append([] if candidate else None)
+        self._capture_starts.append(position)
+        self._counts_at_push.append((self._latex_marks, self._ambiguous))
+
+    def _pop(self):
+        container = self._stack.pop()
+        self._keys.pop()
+        self._expect_key.pop()
+        self._container_keys.pop()
+        self._captures.pop()
+        self._capture_starts.pop()
+        self._counts_at_push.pop()
+        self._add_value(container)
+        return container
+
+    def _add_value(self, value) -> None:
+        if not self._stack:
+            return
+        parent = self._stack[-1]
+        if isinstance(parent, list):
+            parent.append(value)
+        elif self._keys[-1] is not None:
+            parent[self._keys[-1]] = value
+            self._keys[-1] = None
+            self._expect_key[-1] = True
+
+    def _is_exercise(self, obj: dict) -> bool:
+        return 'id' in obj and ('content' in obj or 'title' in obj)
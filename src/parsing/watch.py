@@ -0,0 +1,308 @@
+"""
+Watch mode for LaTeX exercise extraction.
+
+Keeps a warm extractor in-process and re-extracts only the .tex files that
+changed, updating only the affected exercise records in the output store.
+File events come from watchdog (inotify on Linux) when it is installed,
+otherwise from a lightweight mtime poller.
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from src.models import Exercise
+from src.parsing.parsing_exercises import DeterministicExerciseExtractor, HybridExerciseExtractor
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - optional dependency
+    FileSystemEventHandler = object
+    Observer = None
+
+
+# Fields that belong to solving rather than extraction; never overwritten by the watcher
+PRESERVED_FIELDS = ('status', 'solutions')
+
+
+class ExerciseStore:
+    """Per-exercise JSON records on disk, as written by test_parsing.py."""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def record_path(self, exercise_id: str) -> Path:
+        """Path of the JSON record for an exercise ID."""
+        return self.output_dir / f"exercise_{exercise_id.replace('.', '_')}.json"
+
+    def load(self, exercise_id: str) -> Optional[Dict]:
+        """Load an existing record, or None if missing or unreadable."""
+        path = self.record_path(exercise_id)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def update(self, exercise: Exercise) -> bool:
+        """
+        Write an exercise record if its extracted fields changed.
+
+        Solving state (status and solutions) of an existing record is kept.
+        Returns True if the record was written.
+        """
+        data = exercise.to_dict()
+        existing = self.load(exercise.id)
+
+        if existing is not None:
+            for key in PRESERVED_FIELDS:
+                if key in existing:
+                    data[key] = existing[key]
+            if self._fingerprint(existing) == self._fingerprint(data):
+                return False
+
+        path = self.record_path(exercise.id)
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        tmp_path.replace(path)
+        return True
+
+    def remove(self, exercise_id: str) -> bool:
+        """Remove a record that no longer exists in its source, unless it has solutions."""
+        existing = self.load(exercise_id)
+        if existing is None or existing.get('solutions'):
+            return False
+        self.record_path(exercise_id).unlink()
+        return True
+
+    def _fingerprint(self, data: Dict) -> Dict:
+        """Record contents that matter for change detection."""
+        return {k: v for k, v in data.items() if k != 'extraction_timestamp'}
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Forwards watchdog events for .tex files to the watcher."""
+
+    def __init__(self, watcher: 'LatexWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for attr in ('src_path', 'dest_path'):
+            path = getattr(event, attr, None)
+            if path and path.endswith('.tex'):
+                self.watcher.notify(Path(path))
+
+
+class LatexWatcher:
+    """Watches a directory of .tex files and re-extracts changed files."""
+
+    def __init__(self, latex_dir: Path, store: ExerciseStore, use_agent: bool = False,
+                 debounce: float = 0.2, poll_interval: float = 0.25, force_polling: bool = False):
+        self.latex_dir = Path(latex_dir)
+        self.store = store
+        self.use_agent = use_agent
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling
+
+        # Warm extractor, reused for every change
+        if use_agent:
+            self.extractor = HybridExerciseExtractor()
+        else:
+            self.extractor = DeterministicExerciseExtractor()
+
+        self._pending: Dict[Path, float] = {}
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._content_hashes: Dict[Path, str] = {}
+        self._ids_by_source: Dict[Path, Set[str]] = {}
+        self._mtimes: Dict[Path, Tuple[float, int]] = {}
+
+    def notify(self, path: Path) -> None:
+        """Record a change to a file; processing waits until writes settle."""
+        with self._condition:
+            self._pending[path.resolve()] = time.monotonic()
+            self._condition.notify()
+
+    def stop(self) -> None:
+        """Stop the watch loop."""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify()
+
+    def sync_all(self) -> None:
+        """Extract every .tex file once, e.g. on startup."""
+        for path in sorted(self.latex_dir.glob('*.tex')):
+            self.process_file(path.resolve())
+
+    def process_file(self, path: Path) -> None:
+        """Re-extract one file and update only the affected exercise records."""
+        started = time.monotonic()
+
+        if not path.exists():
+            # File deleted or renamed away: drop its records
+            previous_ids = self._ids_by_source.pop(path, set())
+            try:
+                removed = [ex_id for ex_id in self._unclaimed(previous_ids) if self.store.remove(ex_id)]
+            except OSError as e:
+                print(f"Failed to remove records for {path.name}: {e}")
+                self._ids_by_source[path] = previous_ids
+                return
+            self._content_hashes.pop(path, None)
+            if removed:
+                print(f"{path.name}: removed {', '.join(sorted(removed))}")
+            return
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                latex_content = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Failed to read {path}: {e}")
+            return
+
+        # Editors often touch files without changing them
+        content_hash = hashlib.sha1(latex_content.encode('utf-8')).hexdigest()
+        if self._content_hashes.get(path) == content_hash:
+            return
+
+        if self.use_agent:
+            exercises = self.extractor.extract_exercises(latex_content, use_agent=True)
+        else:
+            exercises = self.extractor.extract_exercises(latex_content)
+
+        updated = []
+        current_ids = {exercise.id for exercise in exercises}
+        previous_ids = self._ids_by_source.get(path, set())
+        self._ids_by_source[path] = current_ids
+        try:
+            for exercise in exercises:
+                exercise.source_file = path
+                if self.store.update(exercise):
+                    updated.append(exercise.id)
+            removed = [ex_id for ex_id in self._unclaimed(previous_ids - current_ids) if self.store.remove(ex_id)]
+        except OSError as e:
+            # Leave the content hash unset so the next event for this file retries
+            print(f"Failed to update records for {path.name}: {e}")
+            self._ids_by_source[path] = previous_ids
+            return
+        self._content_hashes[path] = content_hash
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        if updated or removed:
+            print(f"{path.name}: updated {len(updated)}, removed {len(removed)} "
+                  f"of {len(exercises)} exercises in {elapsed_ms:.0f} ms")
+
+    def _unclaimed(self, exercise_ids: Set[str]) -> List[str]:
+        """IDs not produced by any other watched file (e.g. a working copy of a chapter)."""
+        claimed = set().union(*self._ids_by_source.values())
+        return [ex_id for ex_id in exercise_ids if ex_id not in claimed]
+
+    def run(self) -> None:
+        """Sync once, then process debounced changes until stopped."""
+        self.sync_all()
+
+        observer = None
+        poller = None
+        if Observer is not None and not self.force_polling:
+            observer = Observer()
+            observer.schedule(_EventHandler(self), str(self.latex_dir), recursive=False)
+            observer.start()
+            print(f"Watching {self.latex_dir} (native file events)")
+        else:
+            poller = threading.Thread(target=self._poll_loop, daemon=True)
+            poller.start()
+            print(f"Watching {self.latex_dir} (polling every {self.poll_interval}s)")
+
+        try:
+            while not self._stop.is_set():
+                for path in self._take_settled():
+                    self.process_file(path)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            if poller is not None:
+                poller.join()
+
+    def _take_settled(self) -> List[Path]:
+        """Block until some pending files have been quiet for the debounce period."""
+        with self._condition:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                settled = [p for p, t in self._pending.items() if now - t >= self.debounce]
+                if settled:
+                    for path in settled:
+                        del self._pending[path]
+                    return settled
+
+                if self._pending:
+                    oldest = min(self._pending.values())
+                    self._condition.wait(self.debounce - (now - oldest))
+                else:
+                    self._condition.wait()
+        return []
+
+    def _poll_loop(self) -> None:
+        """Fallback change detection by comparing mtimes and sizes."""
+        self._mtimes = self._scan()
+        while not self._stop.wait(self.poll_interval):
+            current = self._scan()
+            for path in current.keys() | self._mtimes.keys():
+                if current.get(path) != self._mtimes.get(path):
+                    self.notify(path)
+            self._mtimes = current
+
+    def _scan(self) -> Dict[Path, Tuple[float, int]]:
+        """Stat all .tex files in the watched directory."""
+        result = {}
+        for path in self.latex_dir.glob('*.tex'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            result[path.resolve()] = (stat.st_mtime, stat.st_size)
+        return result
+
+
+def main():
+    """Watch data/latex/ and keep data/exercises/individual/ up to date."""
+    project_root = Path(__file__).parent.parent.parent
+
+    parser = argparse.ArgumentParser(description="Re-extract exercises when .tex files change.")
+    parser.add_argument('--latex-dir', type=Path, default=project_root / "data" / "latex")
+    parser.add_argument('--output-dir', type=Path, default=project_root / "data" / "exercises" / "individual")
+    parser.add_argument('--use-agent', action='store_true', help="Also run agent-based extraction (slow)")
+    parser.add_argument('--debounce', type=float, default=0.2, help="Seconds of quiet before re-extracting")
+    parser.add_argument('--poll', action='store_true', help="Force polling instead of native file events")
+    args = parser.parse_args()
+
+    watcher = LatexWatcher(
+        args.latex_dir,
+        ExerciseStore(args.output_dir),
+        use_agent=args.use_agent,
+        debounce=args.debounce,
+        force_polling=args.poll
+    )
+    watcher.run()
+
+
+if __name__ == "__main__":
+    main()
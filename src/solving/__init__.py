@@ -0,0 +1,17 @@
+"""
+Exercise solving package for the Rising Sea Solver project.
+"""
+
+from .engine import (
+    SolverBackend,
+    TogetherBackend,
+    StubBackend,
+    MultiModelSolver
+)
+
+__all__ = [
+    'SolverBackend',
+    'TogetherBackend',
+    'StubBackend',
+    'MultiModelSolver'
+]
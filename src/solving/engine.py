@@ -0,0 +1,240 @@
+"""
+Multi-model solving engine.
+
+Sends an exercise to several model backends at once, accepts the first
+attempt that passes review and cancels the attempts still in flight. Every
+attempt is recorded on the exercise as a Solution: reviewed attempts as
+APPROVED or REJECTED, and attempts that never got a verdict (timed out,
+failed, cancelled) as ATTEMPT with the reason in proof_comment.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+import hashlib
+import inspect
+import sys
+import time
+import weakref
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+# Add project root to path for imports
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from together import AsyncTogether
+from src.models import Exercise, Solution, SolutionStatus
+
+
+# reviewer(exercise, content) -> (approved, comments), sync or async
+Reviewer = Callable[[Exercise, str], Union[Tuple[bool, List[str]], Awaitable[Tuple[bool, List[str]]]]]
+
+
+class SolverBackend(ABC):
+    """A model that can attempt exercises, with its own concurrency cap and timeout."""
+
+    def __init__(self, name: str, model_name: str, max_concurrency: int = 4, timeout: float = 120.0):
+        self.name = name
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def semaphore(self) -> asyncio.Semaphore:
+        """Concurrency cap for the running event loop (a semaphore cannot be shared across loops)."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    @abstractmethod
+    async def solve(self, exercise: Exercise) -> str:
+        """Return the model's solution text for an exercise."""
+
+
+class TogetherBackend(SolverBackend):
+    """Backend calling a chat model through the Together API."""
+
+    def __init__(self, model_name: str, api_key: str = None, client=None, name: str = None,
+                 max_concurrency: int = 4, timeout: float = 120.0, max_tokens: int = 4000):
+        super().__init__(name or model_name, model_name, max_concurrency, timeout)
+        # Reads TOGETHER_API_KEY from the environment when no key is given
+        self.client = client or AsyncTogether(api_key=api_key)
+        self.max_tokens = max_tokens
+
+    async def solve(self, exercise: Exercise) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[
+                {"role": "system", "content": self._create_solving_prompt()},
+                {"role": "user", "content": f"Exercise {exercise.id}: {exercise.title}\n\n{exercise.content}"}
+            ],
+            temperature=0.2,
+            max_tokens=self.max_tokens
+        )
+        return response.choices[0].message.content
+
+    def _create_solving_prompt(self) -> str:
+        """Create solving prompt for the LLM."""
+        return """You are an expert in algebraic geometry and category theory. Solve the given exercise from Vakil's "The Rising Sea: Foundations of Algebraic Geometry".
+
+Write a complete, rigorous proof in LaTeX. Address every sub-part of the exercise, state clearly which definitions and earlier results you use, and do not skip steps."""
+
+
+class StubBackend(SolverBackend):
+    """
+    Deterministic offline backend for tests and latency benchmarks.
+
+    Latency is base latency plus a jitter derived from the exercise ID, so the
+    same exercise always takes the same time on the same backend.
+    """
+
+    def __init__(self, name: str, latency: float = 0.1, jitter: float = 0.0, correct: bool = True,
+                 fail: bool = False, max_concurrency: int = 4, timeout: float = 120.0):
+        super().__init__(name, f"stub/{name}", max_concurrency, timeout)
+        self.latency = latency
+        self.jitter = jitter
+        self.correct = correct
+        self.fail = fail
+        self.calls = 0
+        self.completed = 0
+        self.cancelled = 0
+
+    def latency_for(self, exercise: Exercise) -> float:
+        digest = hashlib.sha1(f"{self.name}:{exercise.id}".encode('utf-8')).digest()
+        return self.latency + self.jitter * (digest[0] / 255)
+
+    async def solve(self, exercise: Exercise) -> str:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency_for(exercise))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+        if self.fail:
+            raise RuntimeError(f"{self.name} is unavailable")
+
+        self.completed += 1
+        verdict = "Q.E.D." if self.correct else "(incomplete)"
+        return f"Proof of {exercise.id} by {self.name}. {verdict}"
+
+
+class MultiModelSolver:
+    """Races several backends on each exercise and keeps the first approved attempt."""
+
+    def __init__(self, backends: List[SolverBackend], reviewer: Optional[Reviewer] = None):
+        if not backends:
+            raise ValueError("MultiModelSolver needs at least one backend")
+        self.backends = backends
+        self.reviewer = reviewer
+
+    async def solve(self, exercise: Exercise) -> Optional[Solution]:
+        """
+        Attempt an exercise on all backends concurrently.
+
+        Returns the first approved Solution, or None if no attempt passed
+        review. Attempts still running once a solution is approved are
+        cancelled; those still waiting for their backend's concurrency cap
+        are dropped without being recorded.
+        """
+        # Backends that got past their cap, and their finished output, so
+        # attempts cancelled while running or in review are recorded
+        started: Set[SolverBackend] = set()
+        outputs: Dict[SolverBackend, str] = {}
+        tasks: Dict[asyncio.Task, SolverBackend] = {
+            asyncio.create_task(self._attempt(backend, exercise, started, outputs)): backend
+            for backend in self.backends
+        }
+        order = {task: i for i, task in enumerate(tasks)}
+        pending = set(tasks)
+        winner = None
+
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Backend order breaks ties between attempts finishing together
+                for task in sorted(done, key=order.get):
+                    solution = task.result()
+                    exercise.add_solution(solution)
+                    if winner is None and solution.status == SolutionStatus.APPROVED:
+                        winner = solution
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        for task in sorted(pending, key=order.get):
+            backend = tasks[task]
+            if backend not in started:
+                continue
+            if backend in outputs:
+                reason = "Cancelled during review: another model's attempt was approved first"
+            else:
+                reason = "Cancelled: another model's attempt was approved first"
+            exercise.add_solution(Solution(
+                content=outputs.get(backend, ""),
+                status=SolutionStatus.ATTEMPT,
+                model_name=backend.model_name,
+                proof_comment=[reason]
+            ))
+
+        return winner
+
+    async def solve_all(self, exercises: List[Exercise]) -> List[Optional[Solution]]:
+        """Solve several exercises concurrently; backend concurrency caps are shared."""
+        return await asyncio.gather(*(self.solve(exercise) for exercise in exercises))
+
+    def solve_sync(self, exercise: Exercise) -> Optional[Solution]:
+        """Blocking wrapper around solve() for scripts."""
+        return asyncio.run(self.solve(exercise))
+
+    async def _attempt(self, backend: SolverBackend, exercise: Exercise,
+                       started: Set[SolverBackend], outputs: Dict[SolverBackend, str]) -> Solution:
+        """Run one backend under its concurrency cap and timeout, then review the result."""
+        async with backend.semaphore():
+            started.add(backend)
+            start_time = time.monotonic()
+            try:
+                content = await asyncio.wait_for(backend.solve(exercise), backend.timeout)
+            except asyncio.TimeoutError:
+                return Solution(
+                    content="",
+                    status=SolutionStatus.ATTEMPT,
+                    model_name=backend.model_name,
+                    proof_comment=[f"Timed out after {backend.timeout:g}s"]
+                )
+            except Exception as e:
+                return Solution(
+                    content="",
+                    status=SolutionStatus.ATTEMPT,
+                    model_name=backend.model_name,
+                    proof_comment=[f"Backend error: {e}"]
+                )
+            elapsed = time.monotonic() - start_time
+        outputs[backend] = content
+
+        try:
+            approved, comments = await self._review(exercise, content)
+        except Exception as e:
+            # No verdict, so the attempt stays unreviewed
+            return Solution(
+                content=content,
+                status=SolutionStatus.ATTEMPT,
+                model_name=backend.model_name,
+                proof_comment=[f"Review failed: {e}", f"Generated by {backend.name} in {elapsed:.2f}s"]
+            )
+        return Solution(
+            content=content,
+            status=SolutionStatus.APPROVED if approved else SolutionStatus.REJECTED,
+            model_name=backend.model_name,
+            proof_comment=list(comments) + [f"Generated by {backend.name} in {elapsed:.2f}s"]
+        )
+
+    async def _review(self, exercise: Exercise, content: str) -> Tuple[bool, List[str]]:
+        if self.reviewer is None:
+            # Without a reviewer any non-empty attempt is accepted
+            return bool(content and content.strip()), []
+        result = self.reviewer(exercise, content)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for the local extraction service: coalescing, caching and request validation.
+"""
+
+import http.client
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent))
+
+from src.parsing.parsing_exercises import HybridExerciseExtractor
+from src.parsing.service import ExtractionService, LRUCache, SingleFlight, create_server
+
+LATEX = r"""\subsubsection*{1.1.A. Unimportant Exercise}
+A category in which each morphism is an isomorphism is called a groupoid.
+"""
+
+
+class FailingTogether:
+    """Stands in for the Together client; every call fails."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        raise RuntimeError("rate limited")
+
+
+def test_single_flight_shares_one_computation():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+    results = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "body"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", compute))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [("body", False)] + [("body", True)] * 3
+
+
+def test_single_flight_propagates_errors_and_forgets_the_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: 1) == (1, False)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_agent_failure_is_reported_and_not_cached():
+    client = FailingTogether()
+    service = ExtractionService(lambda: HybridExerciseExtractor(client=client), pool_size=1)
+
+    first = json.loads(service.extract(LATEX))
+    second = json.loads(service.extract(LATEX))
+
+    assert client.calls == 2
+    assert first['agent'] == second['agent'] == 'failed'
+    assert first['agent_error'] == "rate limited"
+    assert [ex['id'] for ex in first['exercises']] == ["1.1.A"]
+    assert service.get_stats()['cache_entries'] == 0
+
+    disabled = json.loads(service.extract(LATEX, use_agent=False))
+    assert disabled['agent'] == 'disabled'
+    assert service.get_stats()['cache_entries'] == 1
+
+
+@pytest.fixture
+def server():
+    service = ExtractionService(lambda: HybridExerciseExtractor(client=FailingTogether()), pool_size=1)
+    server = create_server(service, port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, body: bytes, content_length=None):
+    """POST /extract with an explicit (possibly bogus) Content-Length header."""
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    connection.putrequest('POST', '/extract')
+    if content_length is not None:
+        connection.putheader('Content-Length', content_length)
+    connection.endheaders(body)
+    response = connection.getresponse()
+    data = json.loads(response.read().decode('utf-8'))
+    connection.close()
+    return response.status, data
+
+
+@pytest.mark.parametrize("body, content_length", [
+    (b'{"latex": "x"}', None),
+    (b'{"latex": "x"}', '-1'),
+    (b'{"latex": "x"}', 'abc'),
+    (b'[1, 2]', '6'),
+    (b'{"latex": 3}', '12'),
+    (b'{"latex": "x", "use_agent": "yes"}', '34'),
+    (b'{"latex": "x", "use_agent": 0}', '30'),
+    (b'{"latex": "\xff"}', '14'),
+])
+def test_invalid_requests_get_400(server, body, content_length):
+    status, data = post(server, body, content_length)
+
+    assert status == 400
+    assert data['error'].startswith("Invalid request")
+
+
+def test_valid_request(server):
+    body = json.dumps({'latex': LATEX, 'use_agent': False}).encode('utf-8')
+    status, data = post(server, body, str(len(body)))
+
+    assert status == 200
+    assert data['agent'] == 'disabled'
+    assert [ex['id'] for ex in data['exercises']] == ["1.1.A"]
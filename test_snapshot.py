@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for columnar corpus snapshots, in both on-disk layouts.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent))
+
+pytest.importorskip("numpy")
+
+from src.models import CorpusSnapshot, Exercise, Solution, SolutionStatus, write_snapshot
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+LAYOUTS = [
+    "numpy",
+    pytest.param("arrow", marks=pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow is not installed")),
+]
+
+
+def make_corpus():
+    groupoid = Exercise(id="1.1.A", title="Groupoids", content="Show that a groupoid with one object is a group.",
+                        extraction_method="deterministic", extraction_confidence=0.9)
+    groupoid.add_solution(Solution(content="Proof.", status=SolutionStatus.APPROVED, model_name="model-a"))
+    groupoid.add_solution(Solution(content="Partial.", model_name="model-b"))
+
+    initial = Exercise(id="1.1.B", title="Initial objects", content="Show that initial objects are unique.",
+                       source_file=Path("chapter1.tex"), extraction_method="agent_based",
+                       extraction_confidence=0.5)
+    initial.add_solution(Solution(content="Attempt.", model_name="model-a"))
+
+    # Written before extraction_confidence was serialized
+    legacy = initial.to_dict()
+    legacy.update(id="1.2.A", source_file=None, extraction_method="agent_based")
+    del legacy['extraction_confidence']
+    legacy['solutions'] = []
+    return [groupoid, initial, legacy]
+
+
+def snapshot_of(exercises, path, layout):
+    write_snapshot(exercises, path, layout=layout)
+    return CorpusSnapshot.load(path)
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_round_trip(tmp_path, layout):
+    snapshot = snapshot_of(make_corpus(), tmp_path / "snap", layout)
+
+    assert snapshot.meta['layout'] == layout
+    assert snapshot.num_exercises == 3
+    assert snapshot.num_solutions == 3
+    assert snapshot.exercises['id'].to_list() == ["1.1.A", "1.1.B", "1.2.A"]
+    assert snapshot.exercises['source_file'][1] == "chapter1.tex"
+    assert snapshot.exercises['content'][0] == "Show that a groupoid with one object is a group."
+    assert snapshot.solutions['content'].to_list() == ["Proof.", "Partial.", "Attempt."]
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_counts(tmp_path, layout):
+    snapshot = snapshot_of(make_corpus(), tmp_path / "snap", layout)
+
+    assert snapshot.count_by('exercises', 'extraction_method') == {"agent_based": 2, "deterministic": 1}
+    assert snapshot.solution_counts_by_model() == {"model-a": 2, "model-b": 1}
+    assert snapshot.solution_counts_by_model(SolutionStatus.APPROVED) == {"model-a": 1}
+    assert snapshot.solution_counts_by_model(SolutionStatus.REJECTED) == {}
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_missing_confidence_is_skipped(tmp_path, layout):
+    snapshot = snapshot_of(make_corpus(), tmp_path / "snap", layout)
+
+    assert sum(snapshot.confidence_histogram(bins=10)['counts']) == 2
+    assert snapshot.mean_confidence_by_method() == {"agent_based": 0.5, "deterministic": 0.9}
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_diff_with_duplicate_ids_and_mixed_source_files(tmp_path, layout):
+    extracted = Exercise(id="1.1.A", title="T", content="extracted", extraction_method="deterministic")
+    old = snapshot_of([extracted], tmp_path / "old", layout)
+    new = snapshot_of([
+        extracted,
+        Exercise(id="1.1.A", title="T", content="typed in", extraction_method="manual"),
+        Exercise(id="1.1.A", title="T", content="from file", source_file=Path("x.tex")),
+    ], tmp_path / "new", layout)
+    empty = snapshot_of([], tmp_path / "empty", layout)
+
+    assert new.diff(old) == {'added': [("1.1.A", None), ("1.1.A", "x.tex")], 'removed': [], 'changed': []}
+    assert empty.diff(new)['removed'] == [("1.1.A", None), ("1.1.A", None), ("1.1.A", "x.tex")]
+
+    edited = snapshot_of([Exercise(id="1.1.A", title="T", content="edited", extraction_method="deterministic")],
+                         tmp_path / "edited", layout)
+    assert edited.diff(old) == {'added': [], 'removed': [], 'changed': [("1.1.A", None)]}
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-model solving engine, using the offline stub backend.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent))
+
+from src.models import Exercise, ExerciseStatus, SolutionStatus
+from src.solving import MultiModelSolver, SolverBackend, StubBackend
+
+
+def review(exercise, content):
+    """Approve attempts the stub marked as correct."""
+    approved = content.endswith("Q.E.D.")
+    return approved, [] if approved else ["Proof is incomplete"]
+
+
+def make_exercise(exercise_id="1.1.A"):
+    return Exercise(id=exercise_id, title="Exercise", content="Show that a groupoid with one object is a group.")
+
+
+class CountingBackend(StubBackend):
+    """Stub backend that records its peak number of concurrent calls."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.active = 0
+        self.peak = 0
+
+    async def solve(self, exercise):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().solve(exercise)
+        finally:
+            self.active -= 1
+
+
+def test_first_approved_attempt_wins_and_rest_are_cancelled():
+    fast_wrong = StubBackend("fast-wrong", latency=0.01, correct=False)
+    medium = StubBackend("medium", latency=0.05)
+    slow = StubBackend("slow", latency=5.0)
+    solver = MultiModelSolver([fast_wrong, medium, slow], reviewer=review)
+    exercise = make_exercise()
+
+    winner = solver.solve_sync(exercise)
+
+    assert winner.model_name == "stub/medium"
+    assert winner.status == SolutionStatus.APPROVED
+    assert slow.cancelled == 1 and slow.completed == 0
+    assert exercise.status == ExerciseStatus.COMPLETED
+
+    by_model = {s.model_name: s for s in exercise.solutions}
+    assert len(exercise.solutions) == 3
+    assert by_model["stub/fast-wrong"].status == SolutionStatus.REJECTED
+    assert by_model["stub/slow"].status == SolutionStatus.ATTEMPT
+    assert by_model["stub/slow"].proof_comment[0].startswith("Cancelled")
+
+
+def test_timeouts_and_errors_are_recorded_as_unreviewed_attempts():
+    slow = StubBackend("slow", latency=5.0, timeout=0.05)
+    flaky = StubBackend("flaky", latency=0.01, fail=True)
+    solver = MultiModelSolver([slow, flaky], reviewer=review)
+    exercise = make_exercise()
+
+    assert solver.solve_sync(exercise) is None
+
+    by_model = {s.model_name: s for s in exercise.solutions}
+    assert by_model["stub/slow"].status == SolutionStatus.ATTEMPT
+    assert by_model["stub/slow"].proof_comment == ["Timed out after 0.05s"]
+    assert by_model["stub/flaky"].status == SolutionStatus.ATTEMPT
+    assert by_model["stub/flaky"].proof_comment == ["Backend error: flaky is unavailable"]
+    assert exercise.status == ExerciseStatus.IN_PROGRESS
+
+
+def test_attempt_cancelled_during_review_keeps_its_content():
+    async def slow_review(exercise, content):
+        if "by quick" in content:
+            await asyncio.sleep(5.0)
+        return True, []
+
+    quick = StubBackend("quick", latency=0.01)
+    steady = StubBackend("steady", latency=0.05)
+    exercise = make_exercise()
+
+    winner = MultiModelSolver([quick, steady], reviewer=slow_review).solve_sync(exercise)
+
+    assert winner.model_name == "stub/steady"
+    [cancelled] = [s for s in exercise.solutions if s.model_name == "stub/quick"]
+    assert cancelled.status == SolutionStatus.ATTEMPT
+    assert cancelled.content == "Proof of 1.1.A by quick. Q.E.D."
+    assert cancelled.proof_comment[0].startswith("Cancelled during review")
+
+
+def test_per_backend_cap_is_shared_across_solve_all():
+    capped = CountingBackend("capped", latency=0.02, max_concurrency=2)
+    solver = MultiModelSolver([capped], reviewer=review)
+    exercises = [make_exercise(f"1.1.{letter}") for letter in "ABCDEF"]
+
+    winners = asyncio.run(solver.solve_all(exercises))
+
+    assert all(w is not None for w in winners)
+    assert capped.calls == 6
+    assert capped.peak == 2
+
+
+def test_outer_cancellation_leaves_no_orphaned_tasks():
+    slow = StubBackend("slow", latency=5.0)
+    slower = StubBackend("slower", latency=10.0)
+    solver = MultiModelSolver([slow, slower], reviewer=review)
+
+    async def run():
+        task = asyncio.create_task(solver.solve(make_exercise()))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert asyncio.run(run()) == []
+    assert slow.cancelled == 1 and slower.cancelled == 1
+
+
+def test_solver_backend_is_abstract():
+    with pytest.raises(TypeError):
+        SolverBackend("base", "base")
+
+
+def test_attempts_still_queued_on_a_cap_are_not_recorded():
+    fast = StubBackend("fast", latency=0.02, max_concurrency=5)
+    slow = StubBackend("slow", latency=5.0, max_concurrency=1)
+    solver = MultiModelSolver([fast, slow], reviewer=review)
+    exercises = [make_exercise(f"1.1.{letter}") for letter in "ABCDE"]
+
+    winners = asyncio.run(solver.solve_all(exercises))
+
+    assert [w.model_name for w in winners] == ["stub/fast"] * 5
+    assert slow.calls == 1 and slow.cancelled == 1
+    models = [s.model_name for ex in exercises for s in ex.solutions]
+    assert models.count("stub/fast") == 5
+    assert models.count("stub/slow") == 1
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming parser of agent JSON responses.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent))
+
+from src.parsing.streaming_json import StreamingExerciseParser
+
+
+def parse(text, chunk_size=None):
+    """Feed text in chunks of chunk_size (all at once if None) and close the parser."""
+    parser = StreamingExerciseParser()
+    exercises = []
+    step = chunk_size or max(len(text), 1)
+    for i in range(0, len(text), step):
+        exercises.extend(parser.feed(text[i:i + step]))
+    exercises.extend(parser.close())
+    return exercises
+
+
+def test_valid_json_escapes_round_trip():
+    content = "Show:\nfor every $x$\tthen \\frac{a}{b} \\nabla f \"quoted\" \u00e9"
+    text = json.dumps({"exercises": [{"id": "1.1.A", "title": "T", "content": content}]})
+
+    assert parse(text) == [{"id": "1.1.A", "title": "T", "content": content}]
+
+
+def test_raw_latex_backslashes_are_kept():
+    text = r'''```json
+{"exercises": [{"id": "1.1.A", "title": "T", "content": "Let $\frac{a}{b}$, \mathcal{C}, \{x\}, $\nabla \times \beta$.\nNext"}]}
+```'''
+
+    [exercise] = parse(text)
+    assert exercise["content"] == "Let $\\frac{a}{b}$, \\mathcal{C}, \\{x\\}, $\\nabla \\times \\beta$.\nNext"
+
+
+def test_truncated_object_is_recovered():
+    text = '{"exercises": [{"id": "1.1.A", "content": "done"}, {"id": "1.1.B", "title": "T", "content": "Show that $\\\\rho'
+
+    exercises = parse(text)
+    assert [ex["id"] for ex in exercises] == ["1.1.A", "1.1.B"]
+    assert exercises[1]["content"] == "Show that $\\rho"
+
+
+def test_byte_by_byte_feeding_matches_whole_input():
+    text = 'Here you go:\n```json\n' + json.dumps({"exercises": [
+        {"id": "1.1.A", "title": "T", "content": "a\nb \\frac{1}{2} \u00e9", "confidence": 0.9},
+        {"id": "1.1.B", "title": "U", "content": "\\nabla\tx", "confidence": 0.5},
+    ]}) + '\n```\nDone.'
+
+    expected = parse(text)
+    assert len(expected) == 2
+    assert parse(text, chunk_size=1) == expected
+    assert parse(text, chunk_size=3) == expected
+
+
+def test_nested_objects_are_not_exercises():
+    text = json.dumps({"exercises": [
+        {"id": "1", "content": "x", "parts": [{"id": "a", "content": "y"}]}
+    ]})
+
+    assert parse(text) == [{"id": "1", "content": "x", "parts": [{"id": "a", "content": "y"}]}]
+
+
+def test_top_level_list_and_stray_quotes():
+    text = '[{"id": "1.1.A", "content": "He said "hi" to $G$", "confidence": 0.9,}]'
+
+    assert parse(text) == [{"id": "1.1.A", "content": 'He said "hi" to $G$', "confidence": 0.9}]
+
+
+def test_latex_words_after_escape_letters_are_kept():
+    text = r'''{"exercises": [{"id": "2.1.B", "title": "T", "content": "$\mathcal{F} \twoheadrightarrow \mathcal{G}$, $\bigvee_i$, $\lvert x \rvert$, $\nexists$\nNext"}]}'''
+
+    expected = r"$\mathcal{F} \twoheadrightarrow \mathcal{G}$, $\bigvee_i$, $\lvert x \rvert$, $\nexists$" + "\nNext"
+    assert parse(text)[0]["content"] == expected
+    assert parse(text, chunk_size=1)[0]["content"] == expected
+
+
+def test_escapes_before_letters_stay_escapes_without_other_latex():
+    # Invalid JSON (unescaped quote), but no raw LaTeX in this object
+    text = r'''[{"id": "1", "content": "say "hi"\nthen\tgo"}, {"id": "2", "content": "$\nexists$ and \bigvee"}]'''
+
+    first, second = parse(text)
+    assert first["content"] == 'say "hi"\nthen\tgo'
+    assert second["content"] == r"$\nexists$ and \bigvee"
+
+
+def test_truncated_latex_object_is_decoded_as_latex():
+    text = r'''{"exercises": [{"id": "1.1.A", "title": "T", "content": "Since $\rvert x \rvert$ and \frac'''
+
+    [exercise] = parse(text)
+    assert exercise["content"] == r"Since $\rvert x \rvert$ and \frac"
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for watch mode: record updates, removals, debouncing and write failures.
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent))
+
+from src.parsing.watch import ExerciseStore, LatexWatcher
+
+CHAPTER = r"""\subsubsection*{1.1.A. Unimportant Exercise}
+A category in which each morphism is an isomorphism is called a groupoid.
+
+\subsubsection*{1.1.B. Exercise}
+Show that initial objects are unique up to unique isomorphism.
+"""
+
+
+def make_watcher(tmp_path):
+    latex_dir = tmp_path / "latex"
+    latex_dir.mkdir()
+    store = ExerciseStore(tmp_path / "exercises")
+    return LatexWatcher(latex_dir, store, debounce=0.1), latex_dir, store
+
+
+def write_tex(latex_dir, name, text):
+    path = latex_dir / name
+    path.write_text(text, encoding='utf-8')
+    return path.resolve()
+
+
+def test_edit_updates_only_changed_records_and_keeps_solving_state(tmp_path):
+    watcher, latex_dir, store = make_watcher(tmp_path)
+    path = write_tex(latex_dir, "chapter1.tex", CHAPTER)
+    watcher.process_file(path)
+
+    record = store.load("1.1.A")
+    record['status'] = "in_progress"
+    record['solutions'] = [{"content": "Proof.", "status": "attempt"}]
+    store.record_path("1.1.A").write_text(json.dumps(record), encoding='utf-8')
+    untouched = store.record_path("1.1.B").stat().st_mtime_ns
+
+    time.sleep(0.01)
+    watcher.process_file(write_tex(latex_dir, "chapter1.tex", CHAPTER.replace("groupoid", "groupoid (a category)")))
+
+    updated = store.load("1.1.A")
+    assert updated['content'].endswith("groupoid (a category).")
+    assert updated['status'] == "in_progress"
+    assert updated['solutions'] == [{"content": "Proof.", "status": "attempt"}]
+    assert store.record_path("1.1.B").stat().st_mtime_ns == untouched
+
+
+def test_store_skips_timestamp_only_changes(tmp_path):
+    watcher, latex_dir, store = make_watcher(tmp_path)
+    watcher.process_file(write_tex(latex_dir, "chapter1.tex", CHAPTER))
+
+    # A fresh extraction differs from the stored record only in its timestamp
+    exercises = watcher.extractor.extract_exercises(CHAPTER)
+    for exercise in exercises:
+        exercise.source_file = latex_dir.resolve() / "chapter1.tex"
+    assert [store.update(exercise) for exercise in exercises] == [False, False]
+
+
+def test_records_claimed_by_another_file_are_kept(tmp_path):
+    watcher, latex_dir, store = make_watcher(tmp_path)
+    original = write_tex(latex_dir, "chapter1.tex", CHAPTER)
+    write_tex(latex_dir, "chapter1_copy.tex", CHAPTER)
+    watcher.sync_all()
+
+    original.unlink()
+    watcher.process_file(original)
+    assert store.load("1.1.A") is not None
+
+    # Dropping an exercise from the last file that has it removes its record
+    watcher.process_file(write_tex(latex_dir, "chapter1_copy.tex", CHAPTER.split(r"\subsubsection*{1.1.B")[0]))
+    assert store.load("1.1.A") is not None
+    assert store.load("1.1.B") is None
+
+
+def test_records_with_solutions_are_not_removed(tmp_path):
+    watcher, latex_dir, store = make_watcher(tmp_path)
+    path = write_tex(latex_dir, "chapter1.tex", CHAPTER)
+    watcher.process_file(path)
+    record = store.load("1.1.B")
+    record['solutions'] = [{"content": "Proof.", "status": "approved"}]
+    store.record_path("1.1.B").write_text(json.dumps(record), encoding='utf-8')
+
+    path.unlink()
+    watcher.process_file(path)
+
+    assert store.load("1.1.A") is None
+    assert store.load("1.1.B") is not None
+
+
+def test_failed_write_is_retried_on_next_event(tmp_path, capsys):
+    watcher, latex_dir, store = make_watcher(tmp_path)
+    path = write_tex(latex_dir, "chapter1.tex", CHAPTER)
+
+    real_update = store.update
+
+    def full_disk(exercise):
+        raise OSError(28, "No space left on device")
+
+    store.update = full_disk
+    watcher.process_file(path)
+    assert "Failed to update records for chapter1.tex" in capsys.readouterr().out
+    assert store.load("1.1.A") is None
+
+    store.update = real_update
+    watcher.process_file(path)
+    assert store.load("1.1.A") is not None
+
+
+def test_rapid_notifications_are_debounced(tmp_path):
+    watcher, latex_dir, store = make_watcher(tmp_path)
+    path = write_tex(latex_dir, "chapter1.tex", CHAPTER)
+
+    def keep_writing():
+        for _ in range(3):
+            watcher.notify(path)
+            time.sleep(0.05)
+
+    writer = threading.Thread(target=keep_writing)
+    started = time.monotonic()
+    writer.start()
+    settled = watcher._take_settled()
+    elapsed = time.monotonic() - started
+    writer.join()
+
+    assert settled == [path]
+    # Last notification at ~0.1s, then 0.1s of quiet
+    assert elapsed >= 0.2
+    assert watcher._pending == {}